@@ -1,5 +1,11 @@
+import bisect
+import logging
+import math
 import numpy as np
 '''
+case==-1 (no movement, p0 == pe and v0 == ve)
+trajectory has a single phase of zero duration
+
 case==0 (not hit the vmax)
 d^2x/dt^2
 
@@ -30,11 +36,7 @@ d^2x/dt^2
  min                  -------------
 
 '''
-def v_integ(v0, a, dt):
-	return v0 + a * dt
-
-def p_integ(p0, v0, a, dt):
-	return p0 + v0 * dt + 0.5 * a * dt**2
+logger = logging.getLogger(__name__)
 
 
 class TwoPointInterpolation(object):
@@ -71,6 +73,11 @@ class TwoPointInterpolation(object):
 
 	def calc_trajectory(self):
 		'''calc_trajectory'''
+		#t0 only shifts the trajectory in time, so it is not part of the key
+		inputs = (self.p0, self.v0, self.pe, self.ve, self.amax, self.vmax)
+		if self.trajectory_calced and inputs == self.calced_inputs:
+			return self.te
+
 		vmax = self.vmax
 		v0 = self.v0
 		p0 = self.p0
@@ -80,103 +87,140 @@ class TwoPointInterpolation(object):
 		dp = pe - p0
 		dv = ve - v0
 
-		self.dt = []
-		self.a = []
-		self.v = [v0]
-		self.p = [p0]
-
-		a_signed = self.a_signed = self.amax * dp/np.fabs(dp)
-		b = 2 * v0 / a_signed
-		c = (-dv * (ve + v0) * 0.5 - dp) / a_signed
-		if b*b - 4*c > 0: # not reach the v max
-			dt01 = 0.5 * (-b + np.power(b*b - 4*c, 1/2.0))
-			v1 = v_integ(v0, a_signed, dt01)
-
-			if np.fabs(v1) < vmax:
-				self.case = 0
-				p1 = p_integ(p0, v0, a_signed, dt01)
-				dt1e = dt01 - dv / a_signed
-				self.dt.append(dt01)
-				self.dt.append(dt1e)
-				self.a.extend([a_signed, -a_signed])
-				self.v.append(v1)
-				self.p.append(p1)
-
-			else:
-				self.case = 1
-				#t01
-				v1 = vmax * dp/np.fabs(dp)
-				dt01 = np.fabs((v1 - v0) / a_signed)
-				p1 = p_integ(p0, v0, a_signed, dt01)
-				self.dt.append(dt01)
-				self.a.append(a_signed)
-				self.v.append(v1)
-				self.p.append(p1)
-				#t2e
-				v2 = v1
-				dt2e = - (ve - v2) / a_signed
-				dp2e = p_integ(0, v2, -a_signed, dt2e)
-				dt12 = (pe - p1 - dp2e) / v1
-				#t12
-				p2 = pe - dp2e
-				self.dt.append(dt12)
-				self.dt.append(dt2e)
-				self.a.append(0.0)
-				self.a.append(-a_signed)
-				self.v.append(v2)
-				self.p.append(p2)
-			
-			# self.a.append(0.0)
-			# self.v.append(ve)
-			# self.p.append(pe)
+		if dp == 0 and dv == 0: # no movement
+			self.case = -1
+			self.a_signed = 0.0
+			self.dt = np.zeros(1)
+			self.a = np.zeros(1)
+			self.v = np.array([v0], dtype=np.float64)
+			self.p = np.array([p0], dtype=np.float64)
 
-		else: # any case?
-			print("error")
+		elif dp == 0: # would need to leave p0 and come back
+			logger.error("no trajectory: p0 == pe but v0 != ve")
 			return -1
+
+		else:
+			a_signed = self.a_signed = math.copysign(self.amax, dp)
+			b = 2 * v0 / a_signed
+			c = (-dv * (ve + v0) * 0.5 - dp) / a_signed
+			d = b*b - 4*c
+			if d > 0: # not reach the v max
+				#larger root of dt^2 + b*dt + c = 0 without cancellation
+				q = -0.5 * (b + math.copysign(math.sqrt(d), b))
+				dt01 = max(q, c / q)
+				v1 = v0 + a_signed * dt01
+
+				if math.fabs(v1) < vmax:
+					self.case = 0
+					p1 = p0 + (v0 + 0.5 * a_signed * dt01) * dt01
+					dt1e = dt01 - dv / a_signed
+					self.dt = np.array([dt01, dt1e], dtype=np.float64)
+					self.a = np.array([a_signed, -a_signed], dtype=np.float64)
+					self.v = np.array([v0, v1], dtype=np.float64)
+					self.p = np.array([p0, p1], dtype=np.float64)
+
+				else:
+					self.case = 1
+					#t01
+					v1 = math.copysign(vmax, dp)
+					dt01 = math.fabs((v1 - v0) / a_signed)
+					p1 = p0 + (v0 + 0.5 * a_signed * dt01) * dt01
+					#t2e
+					v2 = v1
+					dt2e = - (ve - v2) / a_signed
+					dp2e = (v2 - 0.5 * a_signed * dt2e) * dt2e
+					dt12 = (pe - p1 - dp2e) / v1
+					#t12
+					p2 = pe - dp2e
+					self.dt = np.array([dt01, dt12, dt2e], dtype=np.float64)
+					self.a = np.array([a_signed, 0.0, -a_signed], dtype=np.float64)
+					self.v = np.array([v0, v1, v2], dtype=np.float64)
+					self.p = np.array([p0, p1, p2], dtype=np.float64)
+
+			else: # any case?
+				logger.error("no trajectory: no real root for the acceleration phase")
+				return -1
 			
-		print("case", self.case)
-		print("dt", self.dt)
-		print("a", self.a)
-		print("v", self.v)
-		print("p", self.p)
+		logger.debug("case %s\ndt %s\na %s\nv %s\np %s", self.case, self.dt, self.a, self.v, self.p)
 
+		if self.dt.min() < 0: # e.g. |ve| > vmax, or too little distance to change speed
+			logger.error("no trajectory: negative phase duration %s", self.dt)
+			self.trajectory_calced = False
+			return -1
+
+		self.t_cum = np.cumsum(self.dt)
+		self.t_start = np.concatenate(([0.0], self.t_cum[:-1]))
+		self.te = float(self.t_cum[-1])
+
+		#python float copies for the scalar get_point, indexing ndarrays returns slower numpy scalars
+		self.t_cum_list = self.t_cum.tolist()
+		self.t_start_list = self.t_start.tolist()
+		self.a_list = self.a.tolist()
+		self.v_list = self.v.tolist()
+		self.p_list = self.p.tolist()
+
+		self.calced_inputs = inputs
 		self.trajectory_calced = True
 
-		return sum(self.dt)
+		return self.te
 
 		
 	def get_point(self,t):
 		'''get pos,vel,acc depends on time t'''
-
-		# output
-		a = 0
-		v = 0
-		p = 0
-
 		tau = t-self.t0
 
 		if tau < 0:
 			a = 0.0
 			v = self.v0
 			p = self.p0
-		elif tau >= sum(self.dt):
+		elif tau >= self.te:
 			a = 0.0
 			v = self.ve
 			p = self.pe
 		else:
-			a_in = v_in = p_in = 0
-			t_in = tau
-			for i in range(len(self.dt)):
-				dt = sum(self.dt[:i+1])
-				if tau <= dt:
-					t_in = tau - sum(self.dt[:i])
-					a_in = self.a[i]
-					v_in = self.v[i]
-					p_in = self.p[i]
-					break
-
-			a = a_in
-			v = v_integ(v_in, a_in, t_in)
-			p = p_integ(p_in, v_in, a_in, t_in)
+			i = bisect.bisect_left(self.t_cum_list, tau)
+			t_in = tau - self.t_start_list[i]
+			v_in = self.v_list[i]
+
+			a = self.a_list[i]
+			v = v_in + a * t_in
+			p = self.p_list[i] + (v_in + 0.5 * a * t_in) * t_in
+
+		return p,v,a
+
+	def get_point_array(self, t_array, out=None):
+		'''get pos,vel,acc arrays depends on time array t_array, written into out=(p,v,a) if given'''
+		tau = np.asarray(t_array, dtype=np.float64) - self.t0
+
+		i = np.minimum(np.searchsorted(self.t_cum, tau), len(self.dt)-1)
+
+		t_in = tau - self.t_start[i]
+		a_in = self.a[i]
+		v_in = self.v[i]
+		p_in = self.p[i]
+
+		if out is None:
+			out = (np.empty_like(tau), np.empty_like(tau), np.empty_like(tau))
+		p, v, a = out
+
+		#horner form, evaluated in place to avoid temporaries
+		a[...] = a_in
+		np.multiply(a_in, t_in, out=v)
+		v += v_in
+		np.multiply(a_in, 0.5, out=p)
+		p *= t_in
+		p += v_in
+		p *= t_in
+		p += p_in
+
+		before = tau < 0
+		a[before] = 0.0
+		v[before] = self.v0
+		p[before] = self.p0
+
+		after = tau >= self.te
+		a[after] = 0.0
+		v[after] = self.ve
+		p[after] = self.pe
 
 		return p,v,a
\ No newline at end of file
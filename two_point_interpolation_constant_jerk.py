@@ -1,3 +1,6 @@
+import bisect
+import logging
+import math
 import numpy as np
 '''
 
@@ -19,6 +22,7 @@ d^3x/dt^3
 *jerk is constant
 
 '''
+logger = logging.getLogger(__name__)
 
 class TwoPointInterpolation(object):
 	def __init__(self):
@@ -50,7 +54,13 @@ class TwoPointInterpolation(object):
 
 	def calc_trajectory(self):
 		'''calc_trajectory'''
-		self.t1 = np.power( np.fabs(self.pe-self.ps)/2.0/self.jmax, 1/3.0 )
+		#t0 only shifts the trajectory in time, so it is not part of the key
+		inputs = (self.ps, self.pe, self.vmax, self.amax, self.jmax)
+		if self.trajectory_calced and inputs == self.calced_inputs:
+			return self.te
+
+		dist = math.fabs(self.pe-self.ps)
+		self.t1 = math.pow( dist/2.0/self.jmax, 1/3.0 )
 		self.te = 0.0
 
 		if self.t1*self.jmax < self.amax: #not hit acc limit
@@ -59,12 +69,12 @@ class TwoPointInterpolation(object):
 				self.te = 4*self.t1
 			else: #hit v limit
 				self.case = 1
-				self.t1 = np.sqrt(self.vmax/self.jmax)
-				self.t2 = np.fabs(self.pe-self.ps)/self.vmax - 2.0*np.sqrt(self.vmax/self.jmax)
+				self.t1 = math.sqrt(self.vmax/self.jmax)
+				self.t2 = dist/self.vmax - 2.0*self.t1
 				self.te =4*self.t1+self.t2
 		else: #hit acc limit
 			self.t1 = self.amax/self.jmax
-			self.t2 = - 1.5*self.t1 + np.sqrt( 4*np.fabs(self.pe-self.ps)/self.amax + 1.0/3.0*self.t1**2 )/2.0
+			self.t2 = - 1.5*self.t1 + math.sqrt( 4*dist/self.amax + self.t1*self.t1 )/2.0
 			if (self.t1+self.t2)*self.amax < self.vmax: #not hit v limit
 				self.case = 2
 				self.te = 4*self.t1 + 2*self.t2
@@ -72,11 +82,58 @@ class TwoPointInterpolation(object):
 				self.case = 3
 				self.t1 = self.amax/self.jmax
 				self.t2 = self.vmax/self.amax - self.t1
-				self.t3 = np.fabs(self.pe-self.ps)/self.vmax - 2*self.t1 - self.t2
+				self.t3 = dist/self.vmax - 2*self.t1 - self.t2
 				self.te = 4*self.t1+2*self.t2+self.t3
 			
-		print("case", self.case, self.te)
+		logger.debug("case %s %s", self.case, self.te)
+
+		#segment table: duration and jerk of each constant-jerk segment
+		t1 = self.t1
+		if self.case == 0:
+			dt = [t1, 2*t1, t1]
+			jerk = [1.0, -1.0, 1.0]
+		elif self.case == 1:
+			dt = [t1, t1, self.t2, t1, t1]
+			jerk = [1.0, -1.0, 0.0, -1.0, 1.0]
+		elif self.case == 2:
+			dt = [t1, self.t2, 2*t1, self.t2, t1]
+			jerk = [1.0, 0.0, -1.0, 0.0, 1.0]
+		else:
+			dt = [t1, self.t2, t1, self.t3, t1, self.t2, t1]
+			jerk = [1.0, 0.0, -1.0, 0.0, -1.0, 0.0, 1.0]
 
+		jmax = self.jmax
+		if self.pe < self.ps:
+			jmax = -jmax
+		jerk = [jmax*jk for jk in jerk]
+
+		#state at the start of each segment
+		a = [0.0]
+		v = [0.0]
+		p = [self.ps]
+		for h, jk in zip(dt[:-1], jerk[:-1]):
+			p.append(p[-1] + (v[-1] + (0.5*a[-1] + jk/6.0*h)*h)*h)
+			v.append(v[-1] + (a[-1] + 0.5*jk*h)*h)
+			a.append(a[-1] + jk*h)
+
+		self.dt = np.array(dt, dtype=np.float64)
+		self.j = np.array(jerk, dtype=np.float64)
+		self.a = np.array(a, dtype=np.float64)
+		self.v = np.array(v, dtype=np.float64)
+		self.p = np.array(p, dtype=np.float64)
+		self.t_cum = np.cumsum(self.dt)
+		self.t_start = np.concatenate(([0.0], self.t_cum[:-1]))
+		self.te = float(self.t_cum[-1])
+
+		#python float copies for the scalar get_point, indexing ndarrays returns slower numpy scalars
+		self.t_cum_list = self.t_cum.tolist()
+		self.t_start_list = self.t_start.tolist()
+		self.j_list = self.j.tolist()
+		self.a_list = self.a.tolist()
+		self.v_list = self.v.tolist()
+		self.p_list = self.p.tolist()
+
+		self.calced_inputs = inputs
 		self.trajectory_calced = True
 
 		return self.te
@@ -84,259 +141,69 @@ class TwoPointInterpolation(object):
 		
 	def get_point(self,t):
 		'''get pos,vel,acc depends on time t'''
-		j = 0
-		a = 0
-		v = 0
-		p = 0
-
 		tau = t-self.t0
-		jmax = self.jmax
-		amax = self.amax
-		vmax = self.vmax
-		t1 = self.t1
 
-		if self.case == 0 :
-			if tau < 0:
-				j = jmax
-				if self.pe < self.ps:
-					j = -j
-				a = 0.0
-				v = 0.0
-				p = self.ps
-			elif tau < 4*t1:
-				if tau<t1:
-					j = jmax
-					a = jmax*tau
-					v = 0.5*jmax*tau**2
-					p = 1.0/6.0*jmax*tau**3
-
-				elif tau<3*t1:
-					tau1 = tau - t1
-					j = -jmax
-					a = -jmax*tau1 + jmax*t1
-					v = -0.5*jmax*tau1**2 + jmax*t1*tau1 + 0.5*jmax*t1**2
-					p = -1.0/6.0*jmax*tau1**3 + 0.5*jmax*t1*tau1**2 + 0.5*jmax*t1**2*tau1 + 1.0/6.0*jmax*t1**3
-
-				else: #tau<4*t1:
-					tau3 = tau - 3*t1
-					j = jmax
-					a = jmax*tau3 - jmax*t1
-					v = 0.5*jmax*tau3**2 - jmax*t1*tau3 + 0.5*jmax*t1**2
-					p = 1.0/6.0*jmax*tau3**3 - 0.5*jmax*t1*tau3**2 + 0.5*jmax*t1**2*tau3 + 11.0/6.0*jmax*t1**3
-
-				if self.pe < self.ps:
-					j = -j
-					a = -a
-					v = -v
-					p = -p
-
-				p += self.ps
-
-			else: #tau > 4*t1:
-				j = jmax
-				if self.pe < self.ps:
-					j = -j
-				a = 0.0
-				v = 0.0
-				p = self.pe
-
-		elif self.case == 1 :
-			t2 = self.t2
-			if tau < 0:
-				j = jmax
-				if self.pe < self.ps:
-					j = -j
-				a = 0.0
-				v = 0.0
-				p = self.ps
-			elif tau < 4*t1+t2:
-				if tau<t1:
-					j = jmax
-					a = jmax*tau
-					v = 0.5*jmax*tau**2
-					p = 1.0/6.0*jmax*tau**3
-
-				elif tau<2*t1:
-					tau1 = tau - t1
-					j = -jmax
-					a = -jmax*tau1+jmax*t1
-					v = -0.5*jmax*tau1**2 + jmax*t1*tau1 + 0.5*jmax*t1**2
-					p = -1.0/6.0*jmax*tau1**3 + 0.5*jmax*t1*tau1**2 + 0.5*jmax*t1**2*tau1 + 1.0/6.0*jmax*t1**3
-
-				elif tau < 2*t1+t2:
-					tau2 = tau - 2*t1
-					j = 0
-					a = 0
-					v = vmax
-					p = vmax*tau2+jmax*t1**3
-
-				elif tau < 3*t1+t2:
-					tau3 = tau - 2*t1 - t2
-					j = -jmax
-					a = -jmax*tau3
-					v = -0.5*jmax*tau3**2+vmax
-					p = -1.0/6.0*jmax*tau3**3 + vmax*tau3 + vmax*t2 + jmax*t1**3
- 
-				else: 
-					tau4 = tau - 3*t1 - t2
-					j = jmax
-					a = jmax*tau4 - jmax*t1
-					v = 0.5*jmax*tau4**2 - jmax*t1*tau4 - 0.5*jmax*t1**2+vmax
-					p = 1.0/6.0*jmax*tau4**3 - 0.5*jmax*t1*tau4**2 + 0.5*jmax*t1**2*tau4 + vmax*t2 + vmax*t1 + 5.0/6.0*jmax*t1**3
-
-				if self.pe < self.ps:
-					j = -j
-					a = -a
-					v = -v
-					p = -p
-
-				p += self.ps
-
-			else: #tau > 4*t1:
-				j = jmax
-				if self.pe < self.ps:
-					j = -j
-				a = 0.0
-				v = 0.0
-				p = self.pe
-
-
-		elif self.case == 2 :
-			t2 = self.t2
-			if tau < 0:
-				j = jmax
-				if self.pe < self.ps:
-					j = -j
-				a = 0.0
-				v = 0.0
-				p = self.ps
-			elif tau < 4*t1+2*t2:
-				if tau<t1:
-					j = jmax
-					a = jmax*tau
-					v = 0.5*jmax*tau**2
-					p = 1.0/6.0*jmax*tau**3
-
-				elif tau<t1+t2:
-					tau1 = tau - t1
-					j = 0
-					a = amax
-					v = amax*tau1 + 0.5*amax**2/jmax
-					p = 0.5*amax*tau1**2 + 0.5*amax**2/jmax*tau1 + 1.0/6.0*amax**3/jmax**2
-
-				elif tau < 3*t1+t2:
-					tau2 = tau - t1 - t2
-					j = -jmax
-					a = -jmax*tau2 + amax
-					v = -0.5*jmax*tau2**2 + amax*tau2 + amax*t2 + 0.5*amax**2/jmax
-					p = -1.0/6.0*jmax*tau2**3 + 0.5*amax*tau2**2 + ( amax*t2+0.5*amax**2/jmax )*tau2 + 0.5*amax*t2**2 + 0.5*amax**2/jmax*t2 + 1.0/6.0*amax**3/jmax**2
-
-				elif tau < 3*t1+2*t2:
-					tau3 = tau - 3*t1 - t2
-					j = 0
-					a = -amax
-					v = -amax*tau3 + amax*t2 + 0.5*amax**2/jmax
-					p = -0.5*amax*tau3**2 + (amax*t2+0.5*amax**2/jmax)*tau3 + 0.5*amax*t2**2 + 2.5*amax**2/jmax*t2 + 2.0*amax**3/jmax**2
- 
-				else: 
-					tau4 = tau - 3*t1 - 2*t2
-					j = jmax
-					a = jmax*tau4 - amax
-					v = 0.5*jmax*tau4**2 - amax*tau4 + 0.5*amax**2/jmax
-					p = 1.0/6.0*jmax*tau4**3 - 0.5*amax*tau4**2 + 0.5*amax**2/jmax*tau4 + amax*t2**2 + 3*amax**2/jmax*t2 + 2.0*amax**3/jmax**2
-
-				if self.pe < self.ps:
-					j = -j
-					a = -a
-					v = -v
-					p = -p
-
-				p += self.ps
-
-			else: #tau > 4*t1:
-				j = jmax
-				if self.pe < self.ps:
-					j = -j
-				a = 0.0
-				v = 0.0
-				p = self.pe
-
-		elif self.case == 3 :
-			t2 = self.t2
-			t3 = self.t3
-			if tau < 0:
-				j = jmax
-				if self.pe < self.ps:
-					j = -j
-				a = 0.0
-				v = 0.0
-				p = self.ps
-			elif tau < 4*t1+2*2*t2+t3:
-				if tau<t1:
-					j = jmax
-					a = jmax*tau
-					v = 0.5*jmax*tau**2
-					p = 1.0/6.0*jmax*tau**3
-
-				elif tau<t1+t2:
-					tau1 = tau - t1
-					j = 0
-					a = amax
-					v = amax*tau1 + 0.5*amax**2/jmax
-					p = 0.5*amax*tau1**2 + 0.5*amax**2/jmax*tau1 + 1.0/6.0*amax**3/jmax**2
-
-				elif tau < 2*t1+t2:
-					tau2 = tau - t1 - t2
-					j = -jmax
-					a = -jmax*tau2 + amax
-					v = -0.5*jmax*tau2**2 + amax*tau2 + amax*t2 + 0.5*amax**2/jmax
-					p = -1.0/6.0*jmax*tau2**3 + 0.5*amax*tau2**2 + ( amax*t2+0.5*amax**2/jmax )*tau2 + 0.5*amax*t2**2 + 0.5*amax**2/jmax*t2 + 1.0/6.0*amax**3/jmax**2
-
-				elif tau < 2*t1+t2+t3:
-					tau3 = tau - 2*t1 - t2
-					j = 0
-					a = 0
-					v = vmax
-					p = vmax*tau3 + vmax*t1 + 0.5*vmax*t2
-
-				elif tau < 3*t1+t2+t3:
-					tau4 = tau - 2*t1 - t2 - t3
-					j = -jmax
-					a = -jmax*tau4
-					v = -0.5*jmax*tau4**2 + vmax
-					p = -1.0/6.0*jmax*tau4**3 + vmax*tau4 + vmax*(t1+0.5*t2+t3)
-
-				elif tau< 3*t1+2*t2+t3:
-					tau5 = tau - 3*t1 - t2 - t3
-					j = 0
-					a = -amax
-					v = -amax*tau5 - 0.5*amax**2/jmax + vmax
-					p = -0.5*amax*tau5**2 + (vmax-0.5*amax**2/jmax)*tau5 + vmax*(2.0*t1+0.5*t2+t3) - 1.0/6.0*amax**3/jmax**2
-
-				else: 
-					tau6 = tau - 3*t1 - 2*t2 - t3
-					j = jmax
-					a = jmax*tau6 - amax
-					v = 0.5*jmax*tau6**2 - amax*tau6 + 0.5*amax**2/jmax
-					p = 1.0/6.0*jmax*tau6**3 - 0.5*amax*tau6**2 + 0.5*amax**2/jmax*tau6 + vmax*(2.0*t1+t2+t3) - 1.0/6.0*amax**3/jmax**2
-
-				if self.pe < self.ps:
-					j = -j
-					a = -a
-					v = -v
-					p = -p
-
-				p += self.ps
-
-			else: #tau > 4*t1:
-				j = jmax
-				if self.pe < self.ps:
-					j = -j
-				a = 0.0
-				v = 0.0
-				p = self.pe
+		if tau < 0 or tau >= self.te:
+			j = self.jmax
+			if self.pe < self.ps:
+				j = -j
+			a = 0.0
+			v = 0.0
+			p = self.ps if tau < 0 else self.pe
+			return p,v,a,j
+
+		i = bisect.bisect_right(self.t_cum_list, tau)
+		t_in = tau - self.t_start_list[i]
+		a_in = self.a_list[i]
+		v_in = self.v_list[i]
+
+		j = self.j_list[i]
+		a = a_in + j*t_in
+		v = v_in + (a_in + 0.5*j*t_in)*t_in
+		p = self.p_list[i] + (v_in + (0.5*a_in + j/6.0*t_in)*t_in)*t_in
 
-		else:
-			pass
+		return p,v,a,j
+
+	def get_point_array(self, t_array, out=None):
+		'''get pos,vel,acc,jerk arrays depends on time array t_array, written into out=(p,v,a,j) if given'''
+		tau = np.asarray(t_array, dtype=np.float64) - self.t0
+
+		i = np.minimum(np.searchsorted(self.t_cum, tau, side='right'), len(self.dt)-1)
+
+		t_in = tau - self.t_start[i]
+		j_in = self.j[i]
+		a_in = self.a[i]
+		v_in = self.v[i]
+		p_in = self.p[i]
+
+		if out is None:
+			out = (np.empty_like(tau), np.empty_like(tau), np.empty_like(tau), np.empty_like(tau))
+		p, v, a, j = out
+
+		#horner form, evaluated in place to avoid temporaries
+		j[...] = j_in
+		np.multiply(j_in, t_in, out=a)
+		a += a_in
+		np.multiply(j_in, 0.5, out=v)
+		v *= t_in
+		v += a_in
+		v *= t_in
+		v += v_in
+		np.multiply(j_in, 1.0/6.0, out=p)
+		p *= t_in
+		p += 0.5 * a_in
+		p *= t_in
+		p += v_in
+		p *= t_in
+		p += p_in
+
+		before = tau < 0
+		after = tau >= self.te
+		outside = before | after
+		j[outside] = -self.jmax if self.pe < self.ps else self.jmax
+		a[outside] = 0.0
+		v[outside] = 0.0
+		p[before] = self.ps
+		p[after] = self.pe
 
 		return p,v,a,j
@@ -23,28 +23,21 @@ interp.init(p0, pe, amax, vmax, t0, v0, ve)
 te = interp.calc_trajectory()
 
 #for visualization
-tref = np.arange(t0,t0+te,dt)
-pos=np.zeros((tref.size,3))
-vel=np.zeros((tref.size,3))
-acc=np.zeros((tref.size,3))
-
-# for i in range(0,3,1):
-i = 0
-for j in range(0,tref.size):
-	pos[j][i], vel[j][i], acc[j][i]	= interp.get_point(tref[j])
+tref = np.linspace(t0,t0+te,int(round(te/dt))+1)
+pos, vel, acc = interp.get_point_array(tref)
 
 plt.subplot(3,1,1)
-plt.plot(tref,acc[:,0],'r')
+plt.plot(tref,acc,'r')
 plt.ylabel('acc[m/s^2]')
 
 plt.subplot(3,1,2)
-plt.plot(tref,vel[:,0],'r')
-plt.plot(tref,np.cumsum(acc[:,0])*dt+v0,"--")
+plt.plot(tref,vel,'r')
+plt.plot(tref,np.cumsum(acc)*dt+v0,"--")
 plt.ylabel('vel[m/s]')
 
 plt.subplot(3,1,3)
-plt.plot(tref,pos[:,0],'r')
-plt.plot(tref,np.cumsum(vel[:,0])*dt+p0,"--")
+plt.plot(tref,pos,'r')
+plt.plot(tref,np.cumsum(vel)*dt+p0,"--")
 plt.ylabel('pos[m]')
 plt.xlabel('t[s]')
 plt.show()
\ No newline at end of file
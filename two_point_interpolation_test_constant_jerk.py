@@ -1,6 +1,6 @@
 import numpy as np
 import matplotlib.pyplot as plt
-import two_point_interpolation as tpi
+import two_point_interpolation_constant_jerk as tpi
 
 
 ps = 5.5
@@ -21,34 +21,35 @@ interp.set_initial_time(t0)
 te = interp.calc_trajectory()
 
 #for visualization
-tref = np.arange(t0,t0+te,dt)
-pos=np.zeros((tref.size,3))
-vel=np.zeros((tref.size,3))
-acc=np.zeros((tref.size,3))
-jer=np.zeros((tref.size,3))
-
-# for i in range(0,3,1):
-i = 0
-for j in range(0,tref.size):
-	pos[j][i], vel[j][i], acc[j][i], jer[j][i] 	= interp.get_point(tref[j])
+tref = np.linspace(t0,t0+te,int(round(te/dt))+1)
+pos, vel, acc, jer = interp.get_point_array(tref)
+
+#reintegrated overlays for sanity check
+acc_int = np.cumsum(jer)
+acc_int *= dt
+vel_int = np.cumsum(acc)
+vel_int *= dt
+pos_int = np.cumsum(vel)
+pos_int *= dt
+pos_int += ps
 
 plt.subplot(4,1,1)
-plt.plot(tref,jer[:,0])
+plt.plot(tref,jer)
 plt.ylabel('jerk[m/s^3]')
 
 plt.subplot(4,1,2)
-plt.plot(tref,acc[:,0],'r')
-plt.plot(tref,np.cumsum(jer[:,0])*dt,"--")
+plt.plot(tref,acc,'r')
+plt.plot(tref,acc_int,"--")
 plt.ylabel('acc[m/s^2]')
 
 plt.subplot(4,1,3)
-plt.plot(tref,vel[:,0],'r')
-plt.plot(tref,np.cumsum(acc[:,0])*dt,"--")
+plt.plot(tref,vel,'r')
+plt.plot(tref,vel_int,"--")
 plt.ylabel('vel[m/s]')
 
 plt.subplot(4,1,4)
-plt.plot(tref,pos[:,0],'r')
-plt.plot(tref,np.cumsum(vel[:,0])*dt+ps,"--")
+plt.plot(tref,pos,'r')
+plt.plot(tref,pos_int,"--")
 plt.ylabel('pos[m]')
 plt.xlabel('t[s]')
 plt.show()
\ No newline at end of file